@@ -1,12 +1,76 @@
 import numpy as np
-import scipy
 from math import sqrt
 from math import log
 from multipledispatch import dispatch
+from concurrent.futures import ThreadPoolExecutor
 import copy
+import os
 
 from shfl.private.data import DPDataAccessDefinition
 from shfl.private.query import IdentityFunction
+from shfl.private.random_generator import mechanism_generator as _rng
+
+# Noise arrays with at least this many elements are sampled in parallel, split in a fixed number of chunks
+_PARALLEL_NOISE_SIZE = 10 ** 6
+_NOISE_CHUNKS = 16
+
+
+def _noise_threads():
+    """Number of threads used to fill the noise chunks, bounded by the CPUs available to this process"""
+    try:
+        n_cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        n_cpus = os.cpu_count() or 1
+    return min(_NOISE_CHUNKS, n_cpus)
+
+
+def _chunked_noise(fill, shape, dtype):
+    """Samples a large noise array in _NOISE_CHUNKS chunks, each one filled by fill(generator, chunk) with an
+    independent generator. The chunks and their seeds do not depend on the host, so seeded runs are reproducible"""
+    noise = np.empty(int(np.prod(shape)), dtype=dtype)
+    seeds = np.random.SeedSequence(_rng.integers(2 ** 63, size=4)).spawn(_NOISE_CHUNKS)
+    generators = [np.random.default_rng(seed) for seed in seeds]
+    with ThreadPoolExecutor(_noise_threads()) as executor:
+        list(executor.map(fill, generators, np.array_split(noise, _NOISE_CHUNKS)))
+    return noise.reshape(shape)
+
+
+def _fill_laplace(generator, chunk):
+    """Fills chunk with standard Laplace samples, as the difference of two standard exponentials"""
+    generator.standard_exponential(dtype=chunk.dtype, out=chunk)
+    chunk -= generator.standard_exponential(chunk.size, dtype=chunk.dtype)
+
+
+def _fill_normal(generator, chunk):
+    """Fills chunk with standard normal samples"""
+    generator.standard_normal(dtype=chunk.dtype, out=chunk)
+
+
+def _laplace_noise(b, shape, dtype):
+    """Laplace noise of scale b, sampled in single precision when the query result is float32"""
+    if np.prod(shape) >= _PARALLEL_NOISE_SIZE:
+        noise = _chunked_noise(_fill_laplace, shape, np.float32 if dtype == np.float32 else np.float64)
+        noise *= b
+        return noise
+    if dtype == np.float32:
+        noise = _rng.standard_exponential(shape, dtype=np.float32)
+        noise -= _rng.standard_exponential(shape, dtype=np.float32)
+        noise *= b
+        return noise
+    return _rng.laplace(loc=0.0, scale=b, size=shape)
+
+
+def _normal_noise(std, shape, dtype):
+    """Gaussian noise of standard deviation std, sampled in single precision when the query result is float32"""
+    if np.prod(shape) >= _PARALLEL_NOISE_SIZE:
+        noise = _chunked_noise(_fill_normal, shape, np.float32 if dtype == np.float32 else np.float64)
+        noise *= std
+        return noise
+    if dtype == np.float32:
+        noise = _rng.standard_normal(shape, dtype=np.float32)
+        noise *= std
+        return noise
+    return _rng.normal(loc=0.0, scale=std, size=shape)
 
 
 class RandomizedResponseCoins(DPDataAccessDefinition):
@@ -62,15 +126,15 @@ class RandomizedResponseCoins(DPDataAccessDefinition):
         data = np.asarray(data)
         self._check_binary_data(data)
 
-        first_coin_flip = scipy.stats.bernoulli.rvs(
-            p=(1 - self._prob_head_first), size=data.shape)
-        second_coin_flip = scipy.stats.bernoulli.rvs(
-            p=self._prob_head_second, size=data.shape)
+        # Given heads in the first flip, coin_flips / prob_head_first is again uniform in [0, 1),
+        # so the second flip is drawn from the same uniform values
+        coin_flips = _rng.random(data.shape)
+        use_random = coin_flips < self._prob_head_first
+        second_coin_flip = coin_flips < self._prob_head_first * self._prob_head_second
 
-        result = data * first_coin_flip + \
-                 (1 - first_coin_flip) * second_coin_flip
+        result = np.where(use_random, second_coin_flip, data)
 
-        return result
+        return result[()]
 
 
 class RandomizedResponseBinary(DPDataAccessDefinition):
@@ -116,6 +180,8 @@ class RandomizedResponseBinary(DPDataAccessDefinition):
         self._f0 = f0
         self._f1 = f1
         self._epsilon = epsilon
+        self._prob_one_given_zero = 1 - f0
+        self._prob_one_given_one = f1
 
     @property
     def epsilon_delta(self):
@@ -135,13 +201,10 @@ class RandomizedResponseBinary(DPDataAccessDefinition):
         data = np.asarray(data)
         self._check_binary_data(data)
 
-        probabilities = np.empty(data.shape)
-        x_zero = data == 0
-        probabilities[x_zero] = 1 - self._f0
-        probabilities[~x_zero] = self._f1
-        x_response = scipy.stats.bernoulli.rvs(p=probabilities)
+        probabilities = np.where(data, self._prob_one_given_one, self._prob_one_given_zero)
+        x_response = (_rng.random(data.shape) < probabilities).astype(data.dtype)
 
-        return x_response
+        return x_response[()]
 
 
 class LaplaceMechanism(DPDataAccessDefinition):
@@ -203,9 +266,12 @@ class LaplaceMechanism(DPDataAccessDefinition):
             query = IdentityFunction()
 
         self._check_epsilon_delta((epsilon, 0))
+        if epsilon == 0:
+            raise ValueError("In the Laplace mechanism epsilon has to be greater than 0")
         self._sensitivity = sensitivity
         self._epsilon = epsilon
         self._query = query
+        self._b = self._noise_scale(sensitivity, epsilon)
 
     @property
     def epsilon_delta(self):
@@ -222,6 +288,18 @@ class LaplaceMechanism(DPDataAccessDefinition):
         except KeyError:
             raise KeyError("The sensitivity does not contain the key {}".format(i))
 
+    @staticmethod
+    def _noise_scale(sensitivity, epsilon):
+        """Laplace scale b = sensitivity / epsilon, keeping the structure of the sensitivity"""
+        if isinstance(sensitivity, dict):
+            return {k: LaplaceMechanism._noise_scale(v, epsilon) for k, v in sensitivity.items()}
+        if isinstance(sensitivity, list):
+            return [LaplaceMechanism._noise_scale(v, epsilon) for v in sensitivity]
+        if isinstance(sensitivity, (np.ndarray, np.ScalarType)):
+            return sensitivity / epsilon
+        raise TypeError("Sensitivity must be a scalar, an array, a list or a dictionary, "
+                        "but {} was provided".format(type(sensitivity).__name__))
+
     def apply(self, data):
         """
         Implementation of abstract method of class
@@ -235,27 +313,52 @@ class LaplaceMechanism(DPDataAccessDefinition):
             Queried data with differential privacy.
         """
         query_result = self._query.get(data)
+        if isinstance(query_result, (int, float)) and isinstance(self._b, float) and self._b >= 0:
+            return query_result + _rng.laplace(loc=0.0, scale=self._b)
 
-        return self._add_noise(query_result, self._sensitivity)
+        return self._add_noise(query_result, self._b)
 
     @dispatch((np.ndarray, np.ScalarType), (np.ndarray, np.ScalarType))
-    def _add_noise(self, obj, sensitivity):
+    def _add_noise(self, obj, b):
         """Add Laplace noise to a scalar or an array"""
-        sensitivity_array = np.asarray(sensitivity)
+        b_array = np.asarray(b)
         obj = np.asarray(obj)
-        self._check_sensitivity_positive(sensitivity_array)
-        self._check_sensitivity_shape(sensitivity_array, obj)
-        b = sensitivity / self._epsilon
-        output = obj + np.random.laplace(loc=0.0, scale=b, size=obj.shape)
-        return output
+        self._check_sensitivity_positive(b_array)
+        self._check_sensitivity_shape(b_array, obj)
+        output = _laplace_noise(b, obj.shape, obj.dtype)
+        np.add(obj, output, out=output)
+        return output[()]
 
     @dispatch((dict, list), (dict, list, np.ndarray, np.ScalarType))
-    def _add_noise(self, obj, sensitivity):
+    def _add_noise(self, obj, b):
         """Add Laplace noise to a list or a dictionary"""
+        if isinstance(b, np.ScalarType) and \
+                all(isinstance(obj[i], (np.ndarray, np.ScalarType)) for i in self._seq_iter(obj)) and \
+                len({np.asarray(obj[i]).dtype for i in self._seq_iter(obj)}) <= 1:
+            return self._add_noise_flat(obj, b)
+
         output = copy.deepcopy(obj)
         for i in self._seq_iter(obj):
-            sensitivity_tmp = self._pick_sensitivity(sensitivity, i)
-            output[i] = self._add_noise(obj[i], sensitivity_tmp)
+            b_tmp = self._pick_sensitivity(b, i)
+            output[i] = self._add_noise(obj[i], b_tmp)
+        return output
+
+    def _add_noise_flat(self, obj, b):
+        """Add Laplace noise with a scalar scale to a list or a dictionary of arrays sharing one dtype,
+        drawing the noise for all the arrays at once"""
+        self._check_sensitivity_positive(b)
+        keys = list(self._seq_iter(obj))
+        arrays = [np.asarray(obj[i]) for i in keys]
+        sizes = [array.size for array in arrays]
+        dtype = arrays[0].dtype if arrays else float
+        noise = _laplace_noise(b, sum(sizes), dtype)
+        noise = np.split(noise, np.cumsum(sizes)[:-1])
+
+        output = copy.copy(obj)
+        for i, array, array_noise in zip(keys, arrays, noise):
+            array_noise = array_noise.reshape(array.shape)
+            np.add(array, array_noise, out=array_noise)
+            output[i] = array_noise[()]
         return output
 
 
@@ -296,13 +399,16 @@ class GaussianMechanism(DPDataAccessDefinition):
             query = IdentityFunction()
 
         self._check_epsilon_delta(epsilon_delta)
-        if epsilon_delta[0] >= 1:
+        if epsilon_delta[0] <= 0 or epsilon_delta[0] >= 1:
             raise ValueError(
                 "In the Gaussian mechanism epsilon have to be greater than 0 and less than 1")
+        if epsilon_delta[1] == 0:
+            raise ValueError("In the Gaussian mechanism delta has to be greater than 0")
         self._check_sensitivity_positive(sensitivity)
-        self._sensitivity = sensitivity
+        self._sensitivity = np.asarray(sensitivity)
         self._epsilon_delta = epsilon_delta
         self._query = query
+        self._std = sqrt(2 * np.log(1.25 / epsilon_delta[1])) * self._sensitivity / epsilon_delta[0]
 
     @property
     def epsilon_delta(self):
@@ -318,13 +424,17 @@ class GaussianMechanism(DPDataAccessDefinition):
         # Returns:
             Queried data with differential privacy.
         """
-        query_result = np.asarray(self._query.get(data))
-        sensitivity = np.asarray(self._sensitivity)
-        self._check_sensitivity_shape(sensitivity, query_result)
-        std = sqrt(2 * np.log(1.25 / self._epsilon_delta[1])) * \
-              sensitivity / self._epsilon_delta[0]
+        query_result = self._query.get(data)
+        if isinstance(query_result, (int, float)) and self._std.ndim == 0:
+            return query_result + _rng.normal(loc=0.0, scale=self._std)
+
+        query_result = np.asarray(query_result)
+        self._check_sensitivity_shape(self._sensitivity, query_result)
 
-        return query_result + np.random.normal(loc=0.0, scale=std, size=query_result.shape)
+        output = _normal_noise(self._std, query_result.shape, query_result.dtype)
+        np.add(query_result, output, out=output)
+
+        return output[()]
 
 
 class ExponentialMechanism(DPDataAccessDefinition):
@@ -352,6 +462,8 @@ class ExponentialMechanism(DPDataAccessDefinition):
         self._delta_u = delta_u
         self._epsilon = epsilon
         self._size = size
+        self._u_points = None
+        self._cdf = None
 
     @property
     def epsilon_delta(self):
@@ -369,9 +481,29 @@ class ExponentialMechanism(DPDataAccessDefinition):
         """
         r_range = self._r
         u_points = self._u(data, r_range)
-        p = np.exp(self._epsilon * u_points / (2 * self._delta_u))
-        p /= p.sum()
-        sample = np.random.choice(
-            a=r_range, size=self._size, replace=True, p=p)
+        if self._u_points is None or not np.array_equal(u_points, self._u_points):
+            self._u_points = np.array(u_points)
+            self._cdf = self._exponential_cdf(u_points, self._epsilon / (2 * self._delta_u))
+        if self._cdf is None:
+            index = _rng.integers(len(self._u_points), size=self._size)
+        else:
+            index = np.searchsorted(self._cdf, _rng.random(self._size), side='right')
+        sample = np.asarray(r_range)[index]
 
         return sample
+
+    @staticmethod
+    def _exponential_cdf(u_points, scale):
+        """Cumulative distribution of the probabilities proportional to exp(scale * u_points).
+        The maximum is subtracted before exponentiating, so large utilities do not overflow.
+        It returns None when the scaled utilities are constant, i.e. the distribution is uniform"""
+        cdf = np.multiply(u_points, scale, dtype=float)
+        cdf_max = cdf.max()
+        if cdf_max - cdf.min() < 1e-12:
+            return None
+        cdf -= cdf_max
+        np.exp(cdf, out=cdf)
+        np.cumsum(cdf, out=cdf)
+        cdf /= cdf[-1]
+
+        return cdf
@@ -6,6 +6,7 @@ from functools import reduce
 from operator import mul
 
 from shfl.private.data import DPDataAccessDefinition
+from shfl.private.random_generator import sampling_generator as array_sampler
 
 
 def prod(iterable):
@@ -15,9 +16,6 @@ def prod(iterable):
     return reduce(mul, iterable, 1)
 
 
-array_sampler = np.random.default_rng()
-
-
 class Sampler(DPDataAccessDefinition):
     """
     This class implements sampling methods which helps to reduce
@@ -1,6 +1,7 @@
 from tensorflow.keras.callbacks import EarlyStopping
 from shfl.model.model import TrainableModel
 import tensorflow as tf
+import numpy as np
 import copy
 
 
@@ -16,6 +17,10 @@ class DeepLearningModel(TrainableModel):
         epochs: Number of epochs
         metrics: Metrics for apply. List of tensorflow metrics.
     """
+    # Inputs fitting in one batch of at most this many samples are predicted calling the model directly,
+    # instead of building a Keras predict loop
+    _direct_call_size = 512
+
     def __init__(self, model, criterion, optimizer, batch_size=None, epochs=1, metrics=None):
         self._model = model
         self._data_shape = model.layers[0].get_input_shape_at(0)[1:]
@@ -26,6 +31,7 @@ class DeepLearningModel(TrainableModel):
         self._criterion = criterion
         self._optimizer = optimizer
         self._metrics = metrics
+        self._callbacks = [EarlyStopping(monitor='val_loss', patience=5, verbose=0, mode='min')]
 
         self._model.compile(optimizer=self._optimizer, loss=self._criterion, metrics=self._metrics)
 
@@ -40,9 +46,8 @@ class DeepLearningModel(TrainableModel):
         self._check_data(data)
         self._check_labels(labels)
 
-        early_stopping = EarlyStopping(monitor='val_loss', patience=5, verbose=0, mode='min')
         self._model.fit(x=data, y=labels, batch_size=self._batch_size, epochs=self._epochs, validation_split=0.2,
-                        verbose=0, shuffle=False, callbacks=[early_stopping])
+                        verbose=0, shuffle=False, callbacks=self._callbacks)
 
     def predict(self, data):
         """
@@ -56,6 +61,9 @@ class DeepLearningModel(TrainableModel):
         """
         self._check_data(data)
 
+        if len(data) < self._direct_call_size and (self._batch_size is None or len(data) <= self._batch_size):
+            return np.asarray(self._model(data, training=False)).argmax(axis=-1)
+
         return self._model.predict(data, batch_size=self._batch_size).argmax(axis=-1)
 
     def evaluate(self, data, labels):
@@ -134,8 +142,15 @@ class DeepLearningModel(TrainableModel):
         for k, v in self.__dict__.items():
             if k == "_model":
                 model = tf.keras.models.clone_model(v)
-                model.set_weights(v.get_weights())
+                if len(model.weights) != len(v.weights):
+                    raise ValueError("Cloned model has " + str(len(model.weights)) + " weights but the model has " +
+                                     str(len(v.weights)))
+                for cloned_weight, weight in zip(model.weights, v.weights):
+                    cloned_weight.assign(weight)
                 setattr(result, k, model)
+            elif k == "_callbacks":
+                # Callbacks hold a reference to the trained model, they are bound again on every fit
+                setattr(result, k, [copy.copy(callback) for callback in v])
             else:
                 setattr(result, k, copy.deepcopy(v, memo))
         result._model.compile(optimizer=result._optimizer, loss=result._criterion, metrics=result._metrics)
@@ -89,7 +89,13 @@ class DPDataAccessDefinition(DataAccessDefinition):
             data: input value which is expected to be made of binary elements.
 
         """
-        if not np.array_equal(data, data.astype(bool)):
+        if data.dtype == bool:
+            return
+        if np.issubdtype(data.dtype, np.unsignedinteger):
+            is_binary = not (data > 1).any()
+        else:
+            is_binary = np.array_equal(data, data.astype(bool))
+        if not is_binary:
             raise ValueError(
                 "This mechanism works with binary data, but input is not binary")
 
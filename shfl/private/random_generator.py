@@ -0,0 +1,21 @@
+import numpy as np
+
+# Shared by the differentially private mechanisms: copies of a mechanism made for each node must not replay the
+# same noise
+mechanism_generator = np.random.default_rng()
+
+# Shared by the differentially private samplers
+sampling_generator = np.random.default_rng()
+
+
+def set_rng_seed(seed):
+    """
+    Seeds the random generators used by the differentially private mechanisms and samplers,
+    so that their outputs are reproducible (see: [Reproducibility](../reproducibility)).
+
+    # Arguments:
+        seed: integer seed
+    """
+    mechanism_seed, sampling_seed = np.random.SeedSequence(seed).spawn(2)
+    mechanism_generator.bit_generator.state = np.random.PCG64(mechanism_seed).state
+    sampling_generator.bit_generator.state = np.random.PCG64(sampling_seed).state
@@ -3,6 +3,8 @@ import numpy as np
 import tensorflow as tf
 import torch
 
+from shfl.private.random_generator import set_rng_seed
+
 
 class Reproducibility:
     """
@@ -66,6 +68,7 @@ class Reproducibility:
         random.seed(self.__seeds[id])
         tf.random.set_seed(self.__seeds[id])
         torch.manual_seed(self.__seeds[id])
+        set_rng_seed(self.__seeds[id])
 
     @property
     def seed(self):
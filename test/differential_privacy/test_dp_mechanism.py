@@ -1,13 +1,16 @@
 import numpy as np
 import pytest
+from math import sqrt
 
 import shfl
 from shfl.private import DataNode
+from shfl.private import Query
 from shfl.differential_privacy.dp_mechanism import RandomizedResponseBinary
 from shfl.differential_privacy.dp_mechanism import RandomizedResponseCoins
 from shfl.differential_privacy.dp_mechanism import LaplaceMechanism
 from shfl.differential_privacy.dp_mechanism import ExponentialMechanism
 from shfl.differential_privacy.dp_mechanism import GaussianMechanism
+from shfl.private.random_generator import set_rng_seed
 from shfl.differential_privacy.composition_dp import AdaptiveDifferentialPrivacy
 from shfl.differential_privacy.probability_distribution import NormalDistribution
 
@@ -115,6 +118,31 @@ def test_randomize_binary_mechanism_array_almost_always_random_values_coins():
     assert np.abs(0.1 - np.mean(result)) < 0.05
 
 
+def test_randomize_binary_mechanism_first_coin_coins():
+    # With a second coin that always answers 0, only the first coin decides to lie
+    data_access_definition = RandomizedResponseCoins(prob_head_first=0.2, prob_head_second=0)
+
+    result_ones = data_access_definition.apply(np.ones(100000))
+    result_zeros = data_access_definition.apply(np.zeros(100000))
+
+    assert np.abs(np.mean(result_ones) - 0.8) < 0.01
+    assert np.mean(result_zeros) == 0
+
+
+def test_randomize_binary_mechanism_probabilities_coins():
+    prob_head_first = 0.3
+    prob_head_second = 0.8
+    data_access_definition = RandomizedResponseCoins(prob_head_first=prob_head_first,
+                                                     prob_head_second=prob_head_second)
+
+    result_zeros = data_access_definition.apply(np.zeros(100000))
+    result_ones = data_access_definition.apply(np.ones(100000))
+
+    # P(1 | 0) = pf * ps and P(1 | 1) = 1 - pf + pf * ps
+    assert np.abs(np.mean(result_zeros) - prob_head_first * prob_head_second) < 0.01
+    assert np.abs(np.mean(result_ones) - (1 - prob_head_first + prob_head_first * prob_head_second)) < 0.01
+
+
 def test_randomize_binary_mechanism_scalar_coins():
     scalar = 1
     node_single = DataNode()
@@ -139,6 +167,20 @@ def test_randomize_binary_mechanism_no_binary_coins():
         federated_array.query()
 
 
+def test_randomize_binary_mechanism_binary_dtypes():
+    data_access_definition = RandomizedResponseBinary(f0=0.5, f1=0.5, epsilon=1)
+
+    bool_result = data_access_definition.apply(np.ones(100, dtype=bool))
+    uint8_result = data_access_definition.apply(np.ones(100, dtype=np.uint8))
+
+    assert bool_result.dtype == bool
+    assert uint8_result.dtype == np.uint8
+    assert ((uint8_result == 0) | (uint8_result == 1)).all()
+
+    with pytest.raises(ValueError):
+        data_access_definition.apply(np.array([0, 1, 2], dtype=np.uint8))
+
+
 def test_randomize_binary_deterministic():
     array = np.array([0, 1])
     node_single = DataNode()
@@ -299,6 +341,28 @@ def test_laplace_scalar_mechanism():
     assert np.abs(scalar - result) < 100
 
     
+def test_laplace_mechanism_single_query_call():
+    class CountingQuery(Query):
+        def __init__(self):
+            self.calls = 0
+
+        def get(self, data):
+            self.calls += 1
+            return data
+
+    query = CountingQuery()
+    data_access_definition = LaplaceMechanism(1, 1, query=query)
+    data_access_definition.apply(np.ones(10))
+    data_access_definition.apply(175)
+
+    assert query.calls == 2
+
+
+def test_laplace_scalar_mechanism_negative_sensitivity():
+    with pytest.raises(ValueError):
+        LaplaceMechanism(-1, 1).apply(175)
+
+
 def test_laplace_mechanism_list_of_arrays():
     n_nodes = 15
     data = [[np.random.rand(3,2), np.random.rand(2,3)] 
@@ -428,6 +492,54 @@ def test_gaussian_scalar_mechanism():
     assert np.abs(scalar - result) < 100
 
 
+def test_float32_mechanisms_dtype():
+    array = np.zeros(10000, dtype=np.float32)
+
+    laplace_result = LaplaceMechanism(1, 1).apply(array)
+    laplace_list_result = LaplaceMechanism(1, 1).apply([array, array])
+    laplace_mixed_result = LaplaceMechanism(1, 1).apply({"weights": array, "bias": array[:10],
+                                                         "counter": np.zeros(1, dtype=np.int64)})
+    gaussian_result = GaussianMechanism(1, epsilon_delta=(0.1, 1)).apply(array)
+
+    assert laplace_result.dtype == np.float32
+    assert np.abs(np.mean(np.abs(laplace_result)) - 1) < 0.1
+    assert all(result.dtype == np.float32 for result in laplace_list_result)
+    assert laplace_mixed_result["weights"].dtype == np.float32
+    assert laplace_mixed_result["bias"].dtype == np.float32
+    assert laplace_mixed_result["counter"].dtype == np.float64
+    assert gaussian_result.dtype == np.float32
+    assert (gaussian_result != array).all()
+
+
+def test_parallel_noise_mechanisms(monkeypatch):
+    monkeypatch.setattr(shfl.differential_privacy.dp_mechanism, "_PARALLEL_NOISE_SIZE", 100)
+    array = np.zeros((100, 100))
+
+    laplace_result = LaplaceMechanism(1, 1).apply(array)
+    gaussian_result = GaussianMechanism(1, epsilon_delta=(0.5, 0.5)).apply(array)
+
+    assert laplace_result.shape == array.shape
+    assert len(np.unique(laplace_result)) == array.size
+    assert np.abs(np.mean(np.abs(laplace_result)) - 1) < 0.1
+    assert gaussian_result.shape == array.shape
+    assert len(np.unique(gaussian_result)) == array.size
+    assert np.abs(np.std(gaussian_result) - sqrt(2 * np.log(2.5)) / 0.5) < 0.2
+
+
+def test_parallel_noise_reproducible(monkeypatch):
+    monkeypatch.setattr(shfl.differential_privacy.dp_mechanism, "_PARALLEL_NOISE_SIZE", 100)
+    array = np.zeros((100, 100), dtype=np.float32)
+    results = []
+    for n_threads in [1, 4]:
+        monkeypatch.setattr(shfl.differential_privacy.dp_mechanism, "_noise_threads", lambda: n_threads)
+        set_rng_seed(1234)
+        results.append((LaplaceMechanism(1, 1).apply(array),
+                        GaussianMechanism(1, epsilon_delta=(0.5, 0.5)).apply(array)))
+
+    assert np.array_equal(results[0][0], results[1][0])
+    assert np.array_equal(results[0][1], results[1][1])
+
+
 def test_exponential_mechanism_pricing():
     
     def u(x, r):
@@ -480,6 +592,59 @@ def test_exponential_mechanism_obtain_laplace():
     assert np.absolute(np.mean(result) - x) < (delta_u/epsilon)     # Check the mean output is close to true value
 
 
+def test_exponential_mechanism_large_utility():
+
+    def u(x, r):
+        return 1000 * r
+
+    r = np.arange(0, 10)
+    delta_u = 1
+    epsilon = 10
+    size = 100
+
+    data_access_definition = ExponentialMechanism(u, r, delta_u, epsilon, size)
+    result = data_access_definition.apply(np.array([1]))
+
+    assert result.shape == (size,)
+    assert (result == r.max()).all()
+
+
+def test_exponential_mechanism_utility_change():
+
+    def u(x, r):
+        return -np.absolute(x - r)
+
+    r = np.arange(0, 10)
+    delta_u = 1
+    epsilon = 100
+    size = 100
+
+    data_access_definition = ExponentialMechanism(u, r, delta_u, epsilon, size)
+
+    assert (data_access_definition.apply(np.array(2)) == 2).all()
+    assert (data_access_definition.apply(np.array(2)) == 2).all()
+    assert (data_access_definition.apply(np.array(7)) == 7).all()
+
+
+def test_exponential_mechanism_constant_utility():
+
+    def u(x, r):
+        return np.ones(len(r))
+
+    r = np.arange(0, 10)
+    delta_u = 1
+    epsilon = 1
+    size = 10000
+
+    data_access_definition = ExponentialMechanism(u, r, delta_u, epsilon, size)
+    result = data_access_definition.apply(np.array([1]))
+
+    assert result.shape == (size,)
+    assert np.isin(result, r).all()
+    assert np.array_equal(np.unique(result), r)
+    assert np.abs(np.mean(result) - np.mean(r)) < 0.2
+
+
 def test_mechanism_safety_checks():
     with pytest.raises(ValueError):
         GaussianMechanism(1, epsilon_delta=(1, 1, 1))
@@ -489,6 +654,18 @@ def test_mechanism_safety_checks():
         
     with pytest.raises(ValueError):
         GaussianMechanism(1, epsilon_delta=(0.5, -1))
+
+    with pytest.raises(ValueError):
+        GaussianMechanism(1, epsilon_delta=(0, 0.5))
+
+    with pytest.raises(ValueError):
+        GaussianMechanism(1, epsilon_delta=(0.5, 0))
+
+    with pytest.raises(ValueError):
+        LaplaceMechanism(1, 0)
+
+    with pytest.raises(TypeError):
+        LaplaceMechanism((1, 1), 1)
         
 
 def test_gaussian_mechanism_correctness():
@@ -1,4 +1,5 @@
 import numpy as np
+import copy
 from unittest.mock import Mock
 import pytest
 import tensorflow as tf
@@ -121,6 +122,10 @@ def test_keras_model_train():
     assert params['batch_size'] == batch
     assert params['epochs'] == epoch
 
+    kdpm.train(data, labels)
+
+    assert kdpm._model.fit.call_args_list[1][1]['callbacks'] is params['callbacks']
+
 
 def test_evaluate():
     model = Mock()
@@ -173,12 +178,49 @@ def test_predict():
 
     num_data = 30
     data = np.array([np.random.rand(24, 24) for i in range(num_data)])
+    kdpm._model.return_value = np.random.rand(num_data, 10)
+
+    predictions = kdpm.predict(data)
+
+    kdpm._model.assert_called_once_with(data, training=False)
+    kdpm._model.predict.assert_not_called()
+    assert np.array_equal(predictions, kdpm._model.return_value.argmax(axis=-1))
+
+    num_data = 100
+    data = np.array([np.random.rand(24, 24) for i in range(num_data)])
 
     kdpm.predict(data)
 
+    kdpm._model.assert_called_once()
     kdpm._model.predict.assert_called_once_with(data, batch_size=batch)
 
 
+def test_predict_large_data_no_batch_size():
+    model = Mock()
+    layer = Mock
+    criterion = Mock()
+    optimizer = Mock()
+    metrics = Mock()
+
+    sizes = [(1, 24, 24), (24, 10)]
+
+    l1 = layer()
+    l1.get_input_shape_at.return_value = sizes[0]
+    l2 = layer()
+    l2.get_output_shape_at.return_value = sizes[1]
+    model.layers = [l1, l2]
+
+    kdpm = DeepLearningModel(model, criterion, optimizer, None, 2, metrics)
+
+    num_data = 1000
+    data = np.array([np.random.rand(24, 24) for i in range(num_data)])
+
+    kdpm.predict(data)
+
+    kdpm._model.assert_not_called()
+    kdpm._model.predict.assert_called_once_with(data, batch_size=None)
+
+
 def test_wrong_predict():
     model = Mock()
     layer = Mock
@@ -295,3 +337,17 @@ def test_performance():
 
     assert res == 0
 
+
+def test_deepcopy():
+    model = tf.keras.models.Sequential([tf.keras.layers.Dense(8, input_shape=(4,), activation='relu'),
+                                        tf.keras.layers.Dense(3, activation='softmax')])
+    kdpm = DeepLearningModel(model, 'categorical_crossentropy', 'adam', batch_size=8, epochs=1)
+
+    copied_kdpm = copy.deepcopy(kdpm)
+
+    assert copied_kdpm._model is not kdpm._model
+    for copied_params, params in zip(copied_kdpm.get_model_params(), kdpm.get_model_params()):
+        assert np.array_equal(copied_params, params)
+
+    data = np.random.rand(30, 4)
+    assert np.array_equal(copied_kdpm.predict(data), kdpm.predict(data))
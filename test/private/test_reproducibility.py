@@ -1,4 +1,6 @@
 from shfl.private import Reproducibility
+from shfl.differential_privacy import RandomizedResponseCoins
+from shfl.differential_privacy import SampleWithoutReplacement
 import numpy as np
 import pytest
 
@@ -34,3 +36,24 @@ def test_set_seed():
     Reproducibility.get_instance().set_seed(id)
 
     assert Reproducibility.get_instance().seeds[id]
+
+
+def test_set_seed_dp_mechanism():
+    Reproducibility.get_instance().delete_instance()
+
+    seed = 1234
+    Reproducibility(seed)
+    data_access_definition = RandomizedResponseCoins()
+    data = np.ones(100)
+
+    sampler = SampleWithoutReplacement(data_access_definition, sample_size=10, data_size=data.shape)
+
+    Reproducibility.get_instance().set_seed('server')
+    first_result = data_access_definition.apply(data)
+    first_sample = sampler.sample(np.arange(100))
+    Reproducibility.get_instance().set_seed('server')
+    second_result = data_access_definition.apply(data)
+    second_sample = sampler.sample(np.arange(100))
+
+    assert np.array_equal(first_result, second_result)
+    assert np.array_equal(first_sample, second_sample)